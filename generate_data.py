@@ -1,11 +1,15 @@
 """
 Generate synthetic ride-sharing datasets and save them as CSV files.
 """
+import argparse
 import csv
 import random
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from scripts.csv_io import COMPRESSION_SUFFIXES, compressed_name, open_csv, remove_other_variants
+from scripts.pricing import DEFAULT_RATES, calculate_fare
+
 # Create data directory if it doesn't exist
 Path("data").mkdir(exist_ok=True)
 
@@ -187,10 +191,7 @@ def generate_trips(num_trips=2000, num_riders=500, num_drivers=100, vehicles_dat
         # Distance: 2-50 km (realistic for ride-sharing)
         distance_km = round(random.uniform(2.0, 50.0), 2)
         # Fare: base $2.50 + $1.50/km + $0.25/minute (simplified pricing)
-        base_fare = 2.50
-        distance_fare = distance_km * 1.50
-        time_fare = duration_minutes * 0.25
-        fare = round(base_fare + distance_fare + time_fare, 2)
+        fare = calculate_fare(distance_km, duration_minutes, **DEFAULT_RATES)
         
         trips.append({
             "trip_id": i,
@@ -237,35 +238,48 @@ def generate_payments(num_trips=2000):
     
     return payments
 
-def write_csv(filename, data, fieldnames):
-    """Write data to CSV file."""
+def write_csv(filename, data, fieldnames, compression=None):
+    """Write data to CSV file, optionally compressed (gz, bz2 or xz)."""
+    filename = compressed_name(filename, compression)
     filepath = Path("data") / filename
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+    with open_csv(filepath, 'w') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(data)
+    # Stale variants of the same table would otherwise shadow the new file
+    remove_other_variants(filepath)
     print(f"Generated {filename} with {len(data)} rows")
 
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate synthetic ride-sharing datasets")
+    parser.add_argument(
+        "--compression", choices=["none"] + list(COMPRESSION_SUFFIXES), default="none",
+        help="compress the generated CSV files with the given codec"
+    )
+    return parser.parse_args()
+
 def main():
     """Generate all datasets."""
+    args = parse_args()
     print("Generating synthetic ride-sharing datasets...")
     
     # Generate drivers
     drivers = generate_drivers(100)
-    write_csv("drivers.csv", drivers, ["driver_id", "name", "phone", "rating", "join_date", "city"])
+    write_csv("drivers.csv", drivers, ["driver_id", "name", "phone", "rating", "join_date", "city"], args.compression)
     
     # Generate riders
     riders = generate_riders(500)
-    write_csv("riders.csv", riders, ["rider_id", "name", "email", "signup_date", "city"])
+    write_csv("riders.csv", riders, ["rider_id", "name", "email", "signup_date", "city"], args.compression)
     
     # Generate vehicles
     vehicles = generate_vehicles(120, 100)
-    write_csv("vehicles.csv", vehicles, ["vehicle_id", "driver_id", "make", "model", "year", "plate_number"])
+    write_csv("vehicles.csv", vehicles, ["vehicle_id", "driver_id", "make", "model", "year", "plate_number"], args.compression)
     
     # Generate trips (pass vehicles data to ensure proper foreign keys)
     trips = generate_trips(2000, 500, 100, vehicles)
     write_csv("trips.csv", trips, ["trip_id", "rider_id", "driver_id", "vehicle_id", "start_time", "end_time", 
-                                    "start_location", "end_location", "distance_km", "fare"])
+                                    "start_location", "end_location", "distance_km", "fare"], args.compression)
     
     # Generate payments (need to match trip fares)
     # First, let's update payments to match trip fares
@@ -287,15 +301,15 @@ def main():
             "payment_time": payment_time.strftime("%Y-%m-%d %H:%M:%S")
         })
     
-    write_csv("payments.csv", payments, ["payment_id", "trip_id", "amount", "method", "status", "payment_time"])
+    write_csv("payments.csv", payments, ["payment_id", "trip_id", "amount", "method", "status", "payment_time"], args.compression)
     
     print("\nAll datasets generated successfully!")
     print(f"Generated files in ./data/ directory:")
-    print("  - drivers.csv (100 rows)")
-    print("  - riders.csv (500 rows)")
-    print("  - vehicles.csv (120 rows)")
-    print("  - trips.csv (2000 rows)")
-    print("  - payments.csv (2000 rows)")
+    print(f"  - {compressed_name('drivers.csv', args.compression)} (100 rows)")
+    print(f"  - {compressed_name('riders.csv', args.compression)} (500 rows)")
+    print(f"  - {compressed_name('vehicles.csv', args.compression)} (120 rows)")
+    print(f"  - {compressed_name('trips.csv', args.compression)} (2000 rows)")
+    print(f"  - {compressed_name('payments.csv', args.compression)} (2000 rows)")
 
 if __name__ == "__main__":
     main()
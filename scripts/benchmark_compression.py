@@ -0,0 +1,121 @@
+"""
+Benchmark the time and space tradeoff of each CSV compression codec.
+
+For every codec the dataset in ./data is written out, measured on disk and
+loaded into an in-memory SQLite database, both sequentially and with
+parallel decompression.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from csv_io import COMPRESSION_SUFFIXES, PrefetchedCsv, compressed_name, find_csv, open_csv, read_csv_rows
+from load_to_sqlite import DATA_DIR, create_tables, load_csv_to_table
+
+TABLES = [
+    ("drivers.csv", "drivers", ["driver_id", "name", "phone", "rating", "join_date", "city"]),
+    ("riders.csv", "riders", ["rider_id", "name", "email", "signup_date", "city"]),
+    ("vehicles.csv", "vehicles", ["vehicle_id", "driver_id", "make", "model", "year", "plate_number"]),
+    ("trips.csv", "trips", ["trip_id", "rider_id", "driver_id", "vehicle_id", "start_time", "end_time",
+                            "start_location", "end_location", "distance_km", "fare"]),
+    ("payments.csv", "payments", ["payment_id", "trip_id", "amount", "method", "status", "payment_time"]),
+]
+
+def read_dataset():
+    """Read every table CSV from the data directory into memory."""
+    dataset = {}
+    for csv_file, _, _ in TABLES:
+        filepath = find_csv(DATA_DIR, csv_file)
+        if filepath is None:
+            print(f"Warning: {csv_file} not found, skipping...")
+            continue
+        dataset[csv_file] = list(read_csv_rows(filepath))
+    return dataset
+
+def write_dataset(dataset, out_dir, compression):
+    """Write the dataset with the given codec and return the file paths."""
+    paths = {}
+    for csv_file, _, columns in TABLES:
+        if csv_file not in dataset:
+            continue
+        filepath = Path(out_dir) / compressed_name(csv_file, compression)
+        with open_csv(filepath, 'w') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(dataset[csv_file])
+        paths[csv_file] = filepath
+    return paths
+
+def load_dataset(paths, parallel):
+    """Load the written files into a fresh in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    # Silence the loader's progress messages
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables(cursor)
+        sources = {}
+        for csv_file, filepath in paths.items():
+            sources[csv_file] = PrefetchedCsv(filepath) if parallel else read_csv_rows(filepath)
+        for csv_file, table_name, columns in TABLES:
+            if csv_file in sources:
+                load_csv_to_table(conn, cursor, csv_file, table_name, columns, rows=sources[csv_file])
+    conn.close()
+
+def timed(func, *args):
+    """Return the wall-clock seconds taken by func(*args)."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark CSV compression codecs")
+    parser.add_argument(
+        "--codecs", nargs="+", choices=["none"] + list(COMPRESSION_SUFFIXES),
+        default=["none"] + list(COMPRESSION_SUFFIXES),
+        help="codecs to benchmark (default: all)"
+    )
+    return parser.parse_args()
+
+def main():
+    """Run the benchmark and print a summary table."""
+    args = parse_args()
+    dataset = read_dataset()
+    if not dataset:
+        print("Error: no CSV files found in ./data!")
+        print("Please run: python generate_data.py first")
+        return
+
+    total_rows = sum(len(rows) for rows in dataset.values())
+    print(f"Benchmarking {len(dataset)} tables ({total_rows} rows)...")
+
+    results = []
+    for codec in args.codecs:
+        with tempfile.TemporaryDirectory(prefix=f"csv_{codec}_") as out_dir:
+            start = time.perf_counter()
+            paths = write_dataset(dataset, out_dir, codec)
+            write_seconds = time.perf_counter() - start
+            size_bytes = sum(p.stat().st_size for p in paths.values())
+            load_seconds = timed(load_dataset, paths, False)
+            parallel_seconds = timed(load_dataset, paths, True)
+        results.append((codec, size_bytes, write_seconds, load_seconds, parallel_seconds))
+
+    baseline_size = results[0][1]
+    print(f"\n{'='*80}")
+    print(f"{'codec':>8} | {'size (KB)':>10} | {'ratio':>6} | {'write (s)':>9} | "
+          f"{'load (s)':>9} | {'parallel load (s)':>17}")
+    print('-'*80)
+    for codec, size_bytes, write_seconds, load_seconds, parallel_seconds in results:
+        ratio = size_bytes / baseline_size if baseline_size else 0
+        print(f"{codec:>8} | {size_bytes / 1024:>10.1f} | {ratio:>6.2f} | {write_seconds:>9.3f} | "
+              f"{load_seconds:>9.3f} | {parallel_seconds:>17.3f}")
+    print('='*80)
+    print(f"Ratios are relative to '{results[0][0]}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Streaming CSV input/output with transparent gzip/bz2/xz compression.
+
+The codec is chosen from the file extension (.csv, .csv.gz, .csv.bz2, .csv.xz).
+"""
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# Supported codecs: name used on the command line -> file extension
+COMPRESSION_SUFFIXES = {
+    "gz": ".gz",
+    "bz2": ".bz2",
+    "xz": ".xz",
+}
+
+# Stdlib openers keyed by file extension
+COMPRESSION_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+# Buffer size for the underlying file (1 MiB)
+IO_BUFFER_SIZE = 1024 * 1024
+
+# Rows handed over per batch by PrefetchedCsv
+PREFETCH_BATCH_ROWS = 5000
+
+# Maximum batches a PrefetchedCsv keeps queued ahead of the consumer
+PREFETCH_MAX_BATCHES = 8
+
+def compressed_name(filename, compression=None):
+    """Return filename with the extension for the given codec appended."""
+    if not compression or compression == "none":
+        return filename
+    return filename + COMPRESSION_SUFFIXES[compression]
+
+def csv_variants(path):
+    """Return the plain and compressed variants of a CSV path that exist."""
+    path = Path(path)
+    if path.suffix in COMPRESSION_OPENERS:
+        path = path.with_suffix("")
+    candidates = [path] + [Path(str(path) + suffix) for suffix in COMPRESSION_OPENERS]
+    return [p for p in candidates if p.exists()]
+
+def find_csv(data_dir, csv_file):
+    """
+    Return the path of csv_file in data_dir, plain or compressed, or None.
+
+    If several variants exist the most recently modified one is used, with a
+    warning naming the files that were ignored.
+    """
+    variants = csv_variants(Path(data_dir) / csv_file)
+    if not variants:
+        return None
+    newest = max(variants, key=lambda p: p.stat().st_mtime)
+    if len(variants) > 1:
+        ignored = ", ".join(str(p) for p in variants if p != newest)
+        print(f"Warning: several variants of {csv_file} found, using the newest "
+              f"{newest} (ignoring {ignored})")
+    return newest
+
+def remove_other_variants(path):
+    """Delete the other plain/compressed variants of a CSV file being written."""
+    for other in csv_variants(path):
+        if other != Path(path):
+            other.unlink()
+
+@contextmanager
+def open_csv(path, mode="r"):
+    """Open a CSV file in text mode ('r' or 'w'), compressing by extension."""
+    path = Path(path)
+    raw = open(path, mode + "b", buffering=IO_BUFFER_SIZE)
+    try:
+        opener = COMPRESSION_OPENERS.get(path.suffix)
+        stream = opener(raw, mode + "b") if opener else raw
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        try:
+            yield text
+        finally:
+            text.close()
+    finally:
+        raw.close()
+
+def read_csv_rows(path):
+    """Yield rows of a (possibly compressed) CSV file as dicts."""
+    with open_csv(path) as f:
+        yield from csv.DictReader(f)
+
+class PrefetchedCsv:
+    """
+    Decompress and parse a CSV file on a background thread.
+
+    Iterating yields the rows as dicts. The zlib, bz2 and lzma codecs release
+    the GIL while decompressing, so several files can be decoded in parallel
+    while the main thread inserts rows into SQLite. A bounded queue keeps
+    memory use independent of the file size.
+    """
+
+    _DONE = object()
+
+    def __init__(self, path, batch_rows=PREFETCH_BATCH_ROWS, max_batches=PREFETCH_MAX_BATCHES):
+        self.path = Path(path)
+        self.batch_rows = batch_rows
+        self._queue = queue.Queue(max_batches)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Read the file in batches and hand them to the consumer."""
+        try:
+            batch = []
+            for row in read_csv_rows(self.path):
+                batch.append(row)
+                if len(batch) >= self.batch_rows:
+                    self._queue.put(batch)
+                    batch = []
+            if batch:
+                self._queue.put(batch)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield from item
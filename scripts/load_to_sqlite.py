@@ -1,14 +1,114 @@
 """
 Load CSV files into SQLite database rideshare.db
 """
+import argparse
+import heapq
 import sqlite3
 import csv
+import tempfile
 from pathlib import Path
 
+from csv_io import PrefetchedCsv, find_csv, read_csv_rows
+from table_stats import update_table_stats
+
 # Create necessary directories
 Path("sql").mkdir(exist_ok=True)
 
-def create_tables(cursor):
+# Directory holding the input CSV files (plain or .gz/.bz2/.xz)
+DATA_DIR = Path("data")
+
+# Physical layouts available for the trips table:
+#   default        - rowid table keyed by trip_id (rows stored in trip_id order)
+#   rowid          - rowid table loaded in start_time order, trip_id kept UNIQUE
+#   without-rowid  - WITHOUT ROWID table clustered on (start_time, trip_id)
+TRIPS_LAYOUTS = ["default", "rowid", "without-rowid"]
+
+# Maximum number of trips held in memory per sorted run during external sort
+DEFAULT_SORT_BUFFER_ROWS = 100000
+
+# Maximum number of sorted runs merged (and open) at once during external sort
+MAX_MERGE_FAN_IN = 64
+
+def create_trips_table(cursor, layout="default"):
+    """Create the trips table using the requested physical layout."""
+    if layout == "default":
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trips (
+                trip_id INTEGER PRIMARY KEY,
+                rider_id INTEGER NOT NULL,
+                driver_id INTEGER NOT NULL,
+                vehicle_id INTEGER NOT NULL,
+                start_time TEXT,
+                end_time TEXT,
+                start_location TEXT,
+                end_location TEXT,
+                distance_km REAL,
+                fare REAL,
+                FOREIGN KEY (rider_id) REFERENCES riders(rider_id),
+                FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
+                FOREIGN KEY (vehicle_id) REFERENCES vehicles(vehicle_id)
+            )
+        """)
+    elif layout == "rowid":
+        # trip_id is no longer the rowid, so rows are stored in insertion
+        # (start_time) order and the start_time index points at adjacent pages
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trips (
+                trip_id INTEGER NOT NULL UNIQUE,
+                rider_id INTEGER NOT NULL,
+                driver_id INTEGER NOT NULL,
+                vehicle_id INTEGER NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                start_location TEXT,
+                end_location TEXT,
+                distance_km REAL,
+                fare REAL,
+                FOREIGN KEY (rider_id) REFERENCES riders(rider_id),
+                FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
+                FOREIGN KEY (vehicle_id) REFERENCES vehicles(vehicle_id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_trips_start_time ON trips (start_time)")
+    elif layout == "without-rowid":
+        # The table b-tree itself is ordered by start_time; the unique index
+        # keeps trip_id lookups (and the payments foreign key) fast
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trips (
+                trip_id INTEGER NOT NULL,
+                rider_id INTEGER NOT NULL,
+                driver_id INTEGER NOT NULL,
+                vehicle_id INTEGER NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                start_location TEXT,
+                end_location TEXT,
+                distance_km REAL,
+                fare REAL,
+                PRIMARY KEY (start_time, trip_id),
+                FOREIGN KEY (rider_id) REFERENCES riders(rider_id),
+                FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
+                FOREIGN KEY (vehicle_id) REFERENCES vehicles(vehicle_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_trips_trip_id ON trips (trip_id)")
+    else:
+        raise ValueError(f"Unknown trips layout: {layout}")
+
+def get_trips_layout(cursor):
+    """Return the layout of the existing trips table, or None if it does not exist."""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='trips'")
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    table_sql = " ".join(row[0].upper().split())
+    if "WITHOUT ROWID" in table_sql:
+        return "without-rowid"
+    if "TRIP_ID INTEGER PRIMARY KEY" in table_sql:
+        return "default"
+    return "rowid"
+
+def create_tables(cursor, trips_layout="default"):
     """Create all tables with proper schema."""
     # Drivers table
     cursor.execute("""
@@ -47,23 +147,7 @@ def create_tables(cursor):
     """)
     
     # Trips table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS trips (
-            trip_id INTEGER PRIMARY KEY,
-            rider_id INTEGER NOT NULL,
-            driver_id INTEGER NOT NULL,
-            vehicle_id INTEGER NOT NULL,
-            start_time TEXT,
-            end_time TEXT,
-            start_location TEXT,
-            end_location TEXT,
-            distance_km REAL,
-            fare REAL,
-            FOREIGN KEY (rider_id) REFERENCES riders(rider_id),
-            FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
-            FOREIGN KEY (vehicle_id) REFERENCES vehicles(vehicle_id)
-        )
-    """)
+    create_trips_table(cursor, trips_layout)
     
     # Payments table
     cursor.execute("""
@@ -80,74 +164,230 @@ def create_tables(cursor):
     
     print("Tables created successfully")
 
-def load_csv_to_table(conn, cursor, csv_file, table_name, columns):
-    """Load data from CSV file into SQLite table."""
-    filepath = Path("data") / csv_file
+def open_csv_rows(csv_file):
+    """Return a row iterator for csv_file (plain or compressed), or None if missing."""
+    filepath = find_csv(DATA_DIR, csv_file)
     
-    if not filepath.exists():
+    if filepath is None:
         print(f"Warning: {csv_file} not found, skipping...")
-        return 0
+        return None
+    
+    return read_csv_rows(filepath)
+
+def load_csv_to_table(conn, cursor, csv_file, table_name, columns, rows=None):
+    """Load data from CSV file (or already opened rows) into SQLite table."""
+    if rows is None:
+        rows = open_csv_rows(csv_file)
+        if rows is None:
+            return 0
     
     # Clear existing data
     cursor.execute(f"DELETE FROM {table_name}")
     
-    # Read and insert data
+    # Insert data
+    placeholders = ','.join(['?'] * len(columns))
+    query = f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+    count = 0
+    for row in rows:
+        # Prepare values in the correct order
+        values = [row.get(col) for col in columns]
+        cursor.execute(query, values)
+        count += 1
+    
+    conn.commit()
+    return count
+
+def _write_run(tmp_dir, run_number, rows):
+    """Write one sorted run to a temporary CSV file and return its path."""
+    run_path = Path(tmp_dir) / f"run_{run_number:05d}.csv"
+    with open(run_path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return run_path
+
+def _read_run(run_path):
+    """Yield rows from a sorted run file."""
+    with open(run_path, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+def external_sort_rows(rows, columns, key_columns, buffer_rows=DEFAULT_SORT_BUFFER_ROWS):
+    """
+    Yield the values of columns for each row dict, ordered by key_columns.
+
+    key_columns is a list of (column_name, converter) pairs. At most
+    buffer_rows rows are held in memory: the input is split into sorted runs
+    on disk which are then merged with heapq.merge, at most MAX_MERGE_FAN_IN
+    runs at a time so the number of open files stays bounded.
+    """
+    key_indexes = [(columns.index(name), convert) for name, convert in key_columns]
+
+    def sort_key(values):
+        return tuple(convert(values[i]) for i, convert in key_indexes)
+
+    def merge_runs(paths):
+        return heapq.merge(*(_read_run(p) for p in paths), key=sort_key)
+
+    with tempfile.TemporaryDirectory(prefix="trips_sort_") as tmp_dir:
+        run_paths = []
+        runs_written = 0
+        buffer = []
+        for row in rows:
+            buffer.append([row.get(col) for col in columns])
+            if len(buffer) >= buffer_rows:
+                buffer.sort(key=sort_key)
+                run_paths.append(_write_run(tmp_dir, runs_written, buffer))
+                runs_written += 1
+                buffer = []
+        buffer.sort(key=sort_key)
+
+        if not run_paths:
+            # Everything fit in memory, no merge needed
+            yield from buffer
+            return
+
+        if buffer:
+            run_paths.append(_write_run(tmp_dir, runs_written, buffer))
+            runs_written += 1
+            buffer = []
+
+        # Merge groups of runs into longer runs until one final merge is left
+        while len(run_paths) > MAX_MERGE_FAN_IN:
+            merged_paths = []
+            for i in range(0, len(run_paths), MAX_MERGE_FAN_IN):
+                group = run_paths[i:i + MAX_MERGE_FAN_IN]
+                merged_paths.append(_write_run(tmp_dir, runs_written, merge_runs(group)))
+                runs_written += 1
+                for path in group:
+                    path.unlink()
+            run_paths = merged_paths
+
+        yield from merge_runs(run_paths)
+
+def load_trips_time_ordered(conn, cursor, csv_file, columns,
+                            buffer_rows=DEFAULT_SORT_BUFFER_ROWS, rows=None):
+    """Load trips in start_time order so date ranges map to contiguous pages."""
+    if rows is None:
+        rows = open_csv_rows(csv_file)
+        if rows is None:
+            return 0
+    
+    # Clear existing data
+    cursor.execute("DELETE FROM trips")
+    
+    sorted_values = external_sort_rows(
+        rows, columns, [("start_time", str), ("trip_id", int)], buffer_rows
+    )
+    placeholders = ','.join(['?'] * len(columns))
+    query = f"INSERT INTO trips ({','.join(columns)}) VALUES ({placeholders})"
+    
     count = 0
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Prepare values in the correct order
-            values = [row.get(col) for col in columns]
-            placeholders = ','.join(['?'] * len(values))
-            query = f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
-            cursor.execute(query, values)
-            count += 1
+    for values in sorted_values:
+        cursor.execute(query, values)
+        count += 1
     
     conn.commit()
     return count
 
+def positive_int(value):
+    """argparse type for integers >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Load CSV files into rideshare.db")
+    parser.add_argument(
+        "--trips-layout", choices=TRIPS_LAYOUTS, default="default",
+        help="physical layout of the trips table; 'rowid' and 'without-rowid' "
+             "store trips clustered by start_time for fast date-range scans"
+    )
+    parser.add_argument(
+        "--sort-buffer-rows", type=positive_int, default=DEFAULT_SORT_BUFFER_ROWS,
+        help="maximum trips held in memory per sorted run when clustering "
+             f"(default: {DEFAULT_SORT_BUFFER_ROWS})"
+    )
+    parser.add_argument(
+        "--parallel-decompress", action="store_true",
+        help="decompress and parse all table files on background threads "
+             "while rows are being inserted"
+    )
+    return parser.parse_args()
+
 def main():
     """Main function to load all CSV files into SQLite."""
+    args = parse_args()
+    
     # Connect to database (creates if doesn't exist)
     conn = sqlite3.connect("rideshare.db")
     cursor = conn.cursor()
     
+    # Switching layouts requires rebuilding the trips table
+    existing_layout = get_trips_layout(cursor)
+    if existing_layout is not None and existing_layout != args.trips_layout:
+        print(f"Rebuilding trips table: {existing_layout} -> {args.trips_layout} layout")
+        cursor.execute("DROP TABLE trips")
+    
     print("Creating database schema...")
-    create_tables(cursor)
+    create_tables(cursor, args.trips_layout)
     
     print("\nLoading data from CSV files...")
     
+    # Start reading every table file up front; tables are still inserted in
+    # foreign key order, but later files decompress while earlier ones load
+    prefetched = {}
+    if args.parallel_decompress:
+        for csv_file in ["drivers.csv", "riders.csv", "vehicles.csv", "trips.csv", "payments.csv"]:
+            filepath = find_csv(DATA_DIR, csv_file)
+            if filepath is not None:
+                prefetched[csv_file] = PrefetchedCsv(filepath)
+    
     # Load drivers
     drivers_count = load_csv_to_table(
         conn, cursor, "drivers.csv", "drivers",
-        ["driver_id", "name", "phone", "rating", "join_date", "city"]
+        ["driver_id", "name", "phone", "rating", "join_date", "city"],
+        rows=prefetched.get("drivers.csv")
     )
     
     # Load riders
     riders_count = load_csv_to_table(
         conn, cursor, "riders.csv", "riders",
-        ["rider_id", "name", "email", "signup_date", "city"]
+        ["rider_id", "name", "email", "signup_date", "city"],
+        rows=prefetched.get("riders.csv")
     )
     
     # Load vehicles
     vehicles_count = load_csv_to_table(
         conn, cursor, "vehicles.csv", "vehicles",
-        ["vehicle_id", "driver_id", "make", "model", "year", "plate_number"]
+        ["vehicle_id", "driver_id", "make", "model", "year", "plate_number"],
+        rows=prefetched.get("vehicles.csv")
     )
     
     # Load trips
-    trips_count = load_csv_to_table(
-        conn, cursor, "trips.csv", "trips",
-        ["trip_id", "rider_id", "driver_id", "vehicle_id", "start_time", "end_time",
-         "start_location", "end_location", "distance_km", "fare"]
-    )
+    trips_columns = ["trip_id", "rider_id", "driver_id", "vehicle_id", "start_time", "end_time",
+                     "start_location", "end_location", "distance_km", "fare"]
+    if args.trips_layout == "default":
+        trips_count = load_csv_to_table(
+            conn, cursor, "trips.csv", "trips", trips_columns,
+            rows=prefetched.get("trips.csv")
+        )
+    else:
+        trips_count = load_trips_time_ordered(
+            conn, cursor, "trips.csv", trips_columns, args.sort_buffer_rows,
+            rows=prefetched.get("trips.csv")
+        )
     
     # Load payments
     payments_count = load_csv_to_table(
         conn, cursor, "payments.csv", "payments",
-        ["payment_id", "trip_id", "amount", "method", "status", "payment_time"]
+        ["payment_id", "trip_id", "amount", "method", "status", "payment_time"],
+        rows=prefetched.get("payments.csv")
     )
     
+    # Refresh the statistics catalog and sqlite_stat1
+    print("\nUpdating table statistics...")
+    update_table_stats(conn, cursor)
+    
     # Print summary
     print("\n" + "="*50)
     print("Data Loading Summary:")
@@ -155,7 +395,7 @@ def main():
     print(f"Inserted {drivers_count} drivers")
     print(f"Inserted {riders_count} riders")
     print(f"Inserted {vehicles_count} vehicles")
-    print(f"Inserted {trips_count} trips")
+    print(f"Inserted {trips_count} trips ({args.trips_layout} layout)")
     print(f"Inserted {payments_count} payments")
     print("="*50)
     print("\nSuccessfully loaded all data into rideshare.db!")
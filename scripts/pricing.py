@@ -0,0 +1,263 @@
+"""
+Declarative trip pricing rules.
+
+A pricing scenario is a JSON document with default rates and an ordered list
+of rules, for example:
+
+    {
+        "name": "weekday_peak_surge",
+        "rates": {"base_fare": 2.50, "per_km": 1.50, "per_minute": 0.25},
+        "rules": [
+            {"type": "rates", "when": {"city": ["New York"]}, "per_km": 2.00},
+            {"type": "multiplier", "when": {"hours": [7, 8, 17, 18]}, "multiplier": 1.5},
+            {"type": "minimum_fare", "amount": 8.00}
+        ]
+    }
+
+Every scenario can price a single trip in Python or be compiled into one SQL
+expression over the trips table, and both give the same fares. The SQL form
+needs register_sql_functions() on the connection: SQLite's ROUND() rounds
+ties away from zero while Python's round() does not, so fares are rounded
+through Python in both cases.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+
+# Default pricing: base $2.50 + $1.50/km + $0.25/minute
+DEFAULT_RATES = {
+    "base_fare": 2.50,
+    "per_km": 1.50,
+    "per_minute": 0.25,
+}
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Weekday names in SQLite strftime('%w') order (Sunday = 0)
+WEEKDAYS = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+
+# Condition key -> (trip fact it tests, SQL expression for that fact on trips)
+CONDITION_FACTS = {
+    "hours": ("hour", "CAST(strftime('%H', start_time) AS INTEGER)"),
+    "weekdays": ("weekday", "CAST(strftime('%w', start_time) AS INTEGER)"),
+    "start_location": ("start_location", "start_location"),
+    "end_location": ("end_location", "end_location"),
+    "city": ("city", "(SELECT city FROM drivers WHERE drivers.driver_id = trips.driver_id)"),
+}
+
+# Trip duration in minutes as computed in SQL
+DURATION_SQL = "((strftime('%s', end_time) - strftime('%s', start_time)) / 60.0)"
+
+def calculate_fare(distance_km, duration_minutes, base_fare=2.50, per_km=1.50, per_minute=0.25):
+    """Return the fare for a trip under simple distance and time rates."""
+    return round(base_fare + distance_km * per_km + duration_minutes * per_minute, 2)
+
+def register_sql_functions(conn):
+    """Register the round_fare() SQL function used by PricingScenario.to_sql()."""
+    conn.create_function("round_fare", 1, lambda fare: round(fare, 2), deterministic=True)
+
+def trip_facts(trip, city=None):
+    """
+    Return the facts pricing rules can test for a trip.
+
+    trip is a mapping with start_time, end_time (TIME_FORMAT strings),
+    distance_km, start_location and end_location; city is the driver's city.
+    """
+    start_time = datetime.strptime(trip["start_time"], TIME_FORMAT)
+    end_time = datetime.strptime(trip["end_time"], TIME_FORMAT)
+    return {
+        "hour": start_time.hour,
+        "weekday": (start_time.weekday() + 1) % 7,
+        "start_location": trip["start_location"],
+        "end_location": trip["end_location"],
+        "city": city,
+        "distance_km": float(trip["distance_km"]),
+        "duration_minutes": (end_time - start_time).total_seconds() / 60,
+    }
+
+class Condition:
+    """All-of match on trip facts; an empty condition matches every trip."""
+
+    def __init__(self, when=None):
+        self.tests = []
+        for key, values in (when or {}).items():
+            if key not in CONDITION_FACTS:
+                raise ValueError(f"Unknown condition '{key}', expected one of {list(CONDITION_FACTS)}")
+            if not isinstance(values, list):
+                values = [values]
+            if key == "weekdays":
+                values = [WEEKDAYS.index(str(day).lower()[:3]) for day in values]
+            self.tests.append((key, values))
+
+    def matches(self, facts):
+        """Return True if the trip facts satisfy every test."""
+        return all(facts[CONDITION_FACTS[key][0]] in values for key, values in self.tests)
+
+    def to_sql(self):
+        """Return (sql, params) for an equivalent boolean SQL expression."""
+        if not self.tests:
+            return "1", []
+        clauses = []
+        params = []
+        for key, values in self.tests:
+            placeholders = ','.join(['?'] * len(values))
+            clauses.append(f"{CONDITION_FACTS[key][1]} IN ({placeholders})")
+            params.extend(values)
+        return " AND ".join(clauses), params
+
+class Rule:
+    """
+    Base class for pricing rules.
+
+    Rules first get a chance to change the rates used for a trip, then to
+    adjust the computed fare. Subclasses override the steps they take part in,
+    each in both a Python and a SQL form, and are registered in RULE_TYPES.
+    """
+
+    def __init__(self, spec):
+        self.when = Condition(spec.get("when"))
+
+    def adjust_rates(self, rates, facts):
+        """Return the rates to use for a trip."""
+        return rates
+
+    def adjust_rates_sql(self, rates_sql):
+        """Return rates as {name: (sql, params)} expressions."""
+        return rates_sql
+
+    def adjust_fare(self, fare, facts):
+        """Return the adjusted fare for a trip."""
+        return fare
+
+    def adjust_fare_sql(self, fare_sql, fare_params):
+        """Return (sql, params) for the adjusted fare expression."""
+        return fare_sql, fare_params
+
+class RatesRule(Rule):
+    """Override some of the rates (e.g. per-city pricing) for matching trips."""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.rates = {name: float(spec[name]) for name in DEFAULT_RATES if name in spec}
+        if not self.rates:
+            raise ValueError(f"rates rule needs at least one of {list(DEFAULT_RATES)}")
+
+    def adjust_rates(self, rates, facts):
+        if self.when.matches(facts):
+            return {**rates, **self.rates}
+        return rates
+
+    def adjust_rates_sql(self, rates_sql):
+        cond_sql, cond_params = self.when.to_sql()
+        adjusted = dict(rates_sql)
+        for name, value in self.rates.items():
+            prev_sql, prev_params = rates_sql[name]
+            adjusted[name] = (
+                f"CASE WHEN {cond_sql} THEN ? ELSE {prev_sql} END",
+                cond_params + [value] + prev_params,
+            )
+        return adjusted
+
+class MultiplierRule(Rule):
+    """Multiply the fare of matching trips (e.g. surge by hour and location)."""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.multiplier = float(spec["multiplier"])
+
+    def adjust_fare(self, fare, facts):
+        if self.when.matches(facts):
+            return fare * self.multiplier
+        return fare
+
+    def adjust_fare_sql(self, fare_sql, fare_params):
+        cond_sql, cond_params = self.when.to_sql()
+        return (
+            f"({fare_sql}) * (CASE WHEN {cond_sql} THEN ? ELSE 1.0 END)",
+            fare_params + cond_params + [self.multiplier],
+        )
+
+class MinimumFareRule(Rule):
+    """Raise the fare of matching trips to at least a fixed amount."""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.amount = float(spec["amount"])
+
+    def adjust_fare(self, fare, facts):
+        if self.when.matches(facts):
+            return max(fare, self.amount)
+        return fare
+
+    def adjust_fare_sql(self, fare_sql, fare_params):
+        cond_sql, cond_params = self.when.to_sql()
+        return (
+            f"MAX({fare_sql}, CASE WHEN {cond_sql} THEN ? ELSE 0.0 END)",
+            fare_params + cond_params + [self.amount],
+        )
+
+# Rule "type" in a scenario document -> rule class
+RULE_TYPES = {
+    "rates": RatesRule,
+    "multiplier": MultiplierRule,
+    "minimum_fare": MinimumFareRule,
+}
+
+class PricingScenario:
+    """Default rates plus an ordered list of rules."""
+
+    def __init__(self, name, rates=None, rules=None):
+        self.name = name
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        self.rule_specs = list(rules or [])
+        self.rules = []
+        for spec in self.rule_specs:
+            rule_type = spec.get("type")
+            if rule_type not in RULE_TYPES:
+                raise ValueError(f"Unknown rule type '{rule_type}', expected one of {list(RULE_TYPES)}")
+            self.rules.append(RULE_TYPES[rule_type](spec))
+
+    @classmethod
+    def from_dict(cls, spec):
+        """Build a scenario from its JSON document."""
+        return cls(spec["name"], spec.get("rates"), spec.get("rules"))
+
+    @classmethod
+    def load(cls, path):
+        """Load a scenario from a JSON file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        spec.setdefault("name", Path(path).stem)
+        return cls.from_dict(spec)
+
+    def to_dict(self):
+        """Return the scenario as a JSON-serialisable document."""
+        return {"name": self.name, "rates": self.rates, "rules": self.rule_specs}
+
+    def price(self, facts):
+        """Return the fare for a trip given its trip_facts()."""
+        rates = self.rates
+        for rule in self.rules:
+            rates = rule.adjust_rates(rates, facts)
+
+        fare = (rates["base_fare"]
+                + facts["distance_km"] * rates["per_km"]
+                + facts["duration_minutes"] * rates["per_minute"])
+        for rule in self.rules:
+            fare = rule.adjust_fare(fare, facts)
+        return round(fare, 2)
+
+    def to_sql(self):
+        """Return (sql, params) computing the fare of each row of trips."""
+        rates_sql = {name: ("?", [value]) for name, value in self.rates.items()}
+        for rule in self.rules:
+            rates_sql = rule.adjust_rates_sql(rates_sql)
+
+        base_sql, base_params = rates_sql["base_fare"]
+        km_sql, km_params = rates_sql["per_km"]
+        minute_sql, minute_params = rates_sql["per_minute"]
+        fare_sql = f"({base_sql}) + distance_km * ({km_sql}) + {DURATION_SQL} * ({minute_sql})"
+        fare_params = base_params + km_params + minute_params
+        for rule in self.rules:
+            fare_sql, fare_params = rule.adjust_fare_sql(fare_sql, fare_params)
+        return f"round_fare({fare_sql})", fare_params
@@ -0,0 +1,233 @@
+"""
+Re-price historical trips under new pricing scenarios and compare revenue.
+
+Fares are recomputed in chunks of trips, committing after each chunk so the
+database is never locked for the whole run. Results go to side tables:
+pricing_scenarios (one row per scenario) and scenario_fares (one fare per
+scenario and trip). --apply writes a scenario's fares back to trips.fare and
+payments.amount.
+"""
+import argparse
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from load_to_sqlite import positive_int
+from pricing import PricingScenario, register_sql_functions, trip_facts
+from run_query import print_table
+from table_stats import record_row_count, update_table_stats
+
+# Trips re-priced per transaction
+DEFAULT_CHUNK_SIZE = 10000
+
+def create_scenario_tables(cursor):
+    """Create the side tables holding scenario results."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pricing_scenarios (
+            scenario TEXT PRIMARY KEY,
+            definition TEXT NOT NULL,
+            engine TEXT,
+            trips_priced INTEGER,
+            created_at TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scenario_fares (
+            scenario TEXT NOT NULL,
+            trip_id INTEGER NOT NULL,
+            fare REAL,
+            PRIMARY KEY (scenario, trip_id)
+        ) WITHOUT ROWID
+    """)
+
+    # Lets each --apply chunk find its payments by trip_id instead of scanning
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_trip_id ON payments (trip_id)")
+
+def trip_id_chunks(cursor, chunk_size):
+    """Yield (first, last) trip_id ranges covering the trips table."""
+    cursor.execute("SELECT MIN(trip_id), MAX(trip_id) FROM trips")
+    min_id, max_id = cursor.fetchone()
+    if min_id is None:
+        return
+    for first in range(min_id, max_id + 1, chunk_size):
+        yield first, min(first + chunk_size - 1, max_id)
+
+def price_with_sql(conn, cursor, scenario, chunk_size):
+    """Compute scenario fares with one INSERT ... SELECT per chunk."""
+    fare_sql, fare_params = scenario.to_sql()
+    query = f"""
+        INSERT INTO scenario_fares (scenario, trip_id, fare)
+        SELECT ?, trip_id, {fare_sql}
+        FROM trips
+        WHERE trip_id BETWEEN ? AND ?
+    """
+    count = 0
+    for first, last in trip_id_chunks(cursor, chunk_size):
+        cursor.execute(query, [scenario.name] + fare_params + [first, last])
+        count += cursor.rowcount
+        conn.commit()
+    return count
+
+def price_with_python(conn, cursor, scenario, chunk_size):
+    """Compute scenario fares in Python, one batch of trips per chunk."""
+    cursor.execute("SELECT driver_id, city FROM drivers")
+    driver_cities = dict(cursor.fetchall())
+
+    query = """
+        SELECT trip_id, driver_id, start_time, end_time,
+               start_location, end_location, distance_km
+        FROM trips
+        WHERE trip_id BETWEEN ? AND ?
+    """
+    count = 0
+    for first, last in trip_id_chunks(cursor, chunk_size):
+        cursor.execute(query, (first, last))
+        columns = [description[0] for description in cursor.description]
+        fares = []
+        for row in cursor.fetchall():
+            trip = dict(zip(columns, row))
+            facts = trip_facts(trip, driver_cities.get(trip["driver_id"]))
+            fares.append((scenario.name, trip["trip_id"], scenario.price(facts)))
+        cursor.executemany(
+            "INSERT INTO scenario_fares (scenario, trip_id, fare) VALUES (?, ?, ?)", fares
+        )
+        count += len(fares)
+        conn.commit()
+    return count
+
+PRICING_ENGINES = {
+    "sql": price_with_sql,
+    "python": price_with_python,
+}
+
+def run_scenario(conn, cursor, scenario, engine="sql", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Re-price every trip under a scenario and record it in the side tables."""
+    create_scenario_tables(cursor)
+    cursor.execute("DELETE FROM scenario_fares WHERE scenario = ?", (scenario.name,))
+    conn.commit()
+
+    count = PRICING_ENGINES[engine](conn, cursor, scenario, chunk_size)
+
+    cursor.execute(
+        "INSERT OR REPLACE INTO pricing_scenarios VALUES (?, ?, ?, ?, ?)",
+        (scenario.name, json.dumps(scenario.to_dict()), engine, count,
+         datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+
+    record_scenario_stats(conn, cursor)
+    return count
+
+def record_scenario_stats(conn, cursor):
+    """
+    Record the side table sizes in the statistics catalog.
+
+    scenario_fares holds exactly trips_priced rows per scenario, so its size
+    comes from the small pricing_scenarios table instead of a scan.
+    """
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(trips_priced), 0) FROM pricing_scenarios")
+    scenario_count, fare_count = cursor.fetchone()
+    record_row_count(conn, cursor, "pricing_scenarios", scenario_count)
+    record_row_count(conn, cursor, "scenario_fares", fare_count)
+
+def apply_scenario(conn, cursor, scenario_name, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Copy a scenario's fares into trips.fare and payments.amount, chunk by chunk."""
+    for first, last in trip_id_chunks(cursor, chunk_size):
+        params = (scenario_name, first, last)
+        cursor.execute("""
+            UPDATE trips
+            SET fare = COALESCE((SELECT sf.fare FROM scenario_fares sf
+                                 WHERE sf.scenario = ? AND sf.trip_id = trips.trip_id), fare)
+            WHERE trip_id BETWEEN ? AND ?
+        """, params)
+        cursor.execute("""
+            UPDATE payments
+            SET amount = COALESCE((SELECT sf.fare FROM scenario_fares sf
+                                   WHERE sf.scenario = ? AND sf.trip_id = payments.trip_id), amount)
+            WHERE trip_id BETWEEN ? AND ?
+        """, params)
+        conn.commit()
+
+    # Fares changed, so refresh their statistics
+    update_table_stats(conn, cursor, ["trips", "payments"])
+
+def compare_scenarios(cursor):
+    """Return (columns, rows) comparing completed-payment revenue per scenario."""
+    cursor.execute("""
+        SELECT
+            sf.scenario,
+            COUNT(*) AS trips,
+            ROUND(SUM(p.amount), 2) AS current_revenue,
+            ROUND(SUM(sf.fare), 2) AS scenario_revenue,
+            ROUND(SUM(sf.fare) - SUM(p.amount), 2) AS revenue_change,
+            ROUND(100.0 * (SUM(sf.fare) - SUM(p.amount)) / SUM(p.amount), 2) AS change_pct
+        FROM
+            scenario_fares sf
+            INNER JOIN payments p ON sf.trip_id = p.trip_id
+        WHERE
+            p.status = 'completed'
+        GROUP BY
+            sf.scenario
+        ORDER BY
+            scenario_revenue DESC
+    """)
+    columns = [description[0] for description in cursor.description]
+    return columns, cursor.fetchall()
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Re-price trips under pricing scenarios")
+    parser.add_argument(
+        "scenarios", nargs="*", type=Path,
+        help="scenario JSON files to run (see pricing/); with none, only compare"
+    )
+    parser.add_argument(
+        "--engine", choices=list(PRICING_ENGINES), default="sql",
+        help="compute fares with chunked SQL statements or in Python batches (default: sql)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE,
+        help=f"trips re-priced per transaction (default: {DEFAULT_CHUNK_SIZE})"
+    )
+    parser.add_argument(
+        "--apply", metavar="SCENARIO",
+        help="write this scenario's fares to trips.fare and payments.amount"
+    )
+    return parser.parse_args()
+
+def main():
+    """Run the requested scenarios and print the revenue comparison."""
+    args = parse_args()
+
+    if not Path("rideshare.db").exists():
+        print("Error: rideshare.db not found!")
+        print("Please run: python scripts/load_to_sqlite.py first")
+        return
+
+    conn = sqlite3.connect("rideshare.db")
+    register_sql_functions(conn)
+    cursor = conn.cursor()
+    create_scenario_tables(cursor)
+
+    for scenario_file in args.scenarios:
+        scenario = PricingScenario.load(scenario_file)
+        count = run_scenario(conn, cursor, scenario, args.engine, args.chunk_size)
+        print(f"Priced {count} trips under scenario '{scenario.name}' ({args.engine} engine)")
+
+    columns, rows = compare_scenarios(cursor)
+    print_table(columns, rows, "PRICING SCENARIO COMPARISON (completed payments)")
+
+    if args.apply:
+        cursor.execute("SELECT 1 FROM pricing_scenarios WHERE scenario = ?", (args.apply,))
+        if cursor.fetchone() is None:
+            print(f"Error: scenario '{args.apply}' has not been run!")
+        else:
+            apply_scenario(conn, cursor, args.apply, args.chunk_size)
+            print(f"Applied scenario '{args.apply}' to trips.fare and payments.amount")
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,83 @@
 """
 Execute SQL reports and save results as CSV files.
 """
+import argparse
 import sqlite3
 import csv
+import time
 from pathlib import Path
 
+from csv_io import COMPRESSION_SUFFIXES, compressed_name, open_csv, remove_other_variants
+from table_stats import read_table_stats
+
 # Create reports directory
 Path("data/reports").mkdir(parents=True, exist_ok=True)
 
+# Named shared-cache in-memory database used for --in-memory runs
+HOT_COPY_URI = "file:rideshare_hot?mode=memory&cache=shared"
+
+# Default largest database copied into memory, in MB
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Indexes built only in the in-memory copy, covering the report joins and groupings
+REPORT_INDEXES = {
+    "hot_payments_trip": "payments (trip_id, status, amount)",
+    "hot_trips_rider": "trips (rider_id, trip_id)",
+    "hot_trips_driver": "trips (driver_id, trip_id)",
+    "hot_trips_route": "trips (start_location, end_location, fare)",
+}
+
+def database_size(conn):
+    """Return the size of the main database of a connection in bytes."""
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+def open_hot_copy(disk_conn, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Copy the database into memory with the backup API and add report indexes.
+
+    Returns the in-memory connection, or None (keep using the disk) when the
+    database, or the copy once its report indexes are built, is larger than
+    memory_budget_mb, or when the copy fails.
+    """
+    disk_size = database_size(disk_conn)
+    budget = memory_budget_mb * 1024 * 1024
+    if disk_size > budget:
+        print(f"Database is {disk_size / 1024 / 1024:.1f} MB, over the {memory_budget_mb} MB "
+              "memory budget; running reports on disk")
+        return None
+    
+    mem_conn = sqlite3.connect(HOT_COPY_URI, uri=True)
+    try:
+        start = time.perf_counter()
+        disk_conn.backup(mem_conn)
+        copy_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for name, definition in REPORT_INDEXES.items():
+            mem_conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+            mem_conn.execute(f"ANALYZE {name}")
+        mem_conn.commit()
+        index_seconds = time.perf_counter() - start
+    except sqlite3.Error as e:
+        mem_conn.close()
+        print(f"In-memory copy failed ({e}); running reports on disk")
+        return None
+    
+    # The report indexes add to the copy, so check the budget again
+    memory_size = database_size(mem_conn)
+    if memory_size > budget:
+        mem_conn.close()
+        print(f"In-memory copy with report indexes is {memory_size / 1024 / 1024:.1f} MB, "
+              f"over the {memory_budget_mb} MB memory budget; running reports on disk")
+        return None
+    
+    print(f"Copied rideshare.db into memory in {copy_seconds:.3f}s "
+          f"({memory_size / 1024 / 1024:.1f} MB in memory, "
+          f"report indexes built in {index_seconds:.3f}s)")
+    return mem_conn
+
 def execute_query(cursor, query, description):
     """Execute a query and return results."""
     cursor.execute(query)
@@ -34,21 +104,61 @@ def print_table(columns, rows, title):
     print(f"\nTotal rows: {len(rows)}")
     print('='*80)
 
-def save_to_csv(columns, rows, filename):
-    """Save query results to CSV file."""
-    filepath = Path("data/reports") / filename
+def print_data_summary(cursor):
+    """Print the size of the input tables from the statistics catalog."""
+    stats = read_table_stats(cursor)
+    if not stats:
+        print("No table statistics found, run scripts/load_to_sqlite.py to build them")
+        return
+    
+    print("Input tables (from statistics catalog):")
+    for table, table_stats in stats.items():
+        line = f"  {table}: {table_stats['row_count']} rows"
+        if table_stats["min_time"]:
+            line += f", {table_stats['min_time']} to {table_stats['max_time']}"
+        print(line)
+
+def save_to_csv(columns, rows, filename, compression=None):
+    """Save query results to CSV file, optionally compressed (gz, bz2 or xz)."""
+    filepath = Path("data/reports") / compressed_name(filename, compression)
     
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+    with open_csv(filepath, 'w') as f:
         writer = csv.writer(f)
         writer.writerow(columns)
         writer.writerows(rows)
+    remove_other_variants(filepath)
     
     print(f"Saved to: {filepath}")
 
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Run SQL reports and save them as CSV")
+    parser.add_argument(
+        "--compression", choices=["none"] + list(COMPRESSION_SUFFIXES), default="none",
+        help="compress the report CSV files with the given codec"
+    )
+    parser.add_argument(
+        "--in-memory", action="store_true",
+        help="copy rideshare.db into memory and run the reports against the copy"
+    )
+    parser.add_argument(
+        "--memory-budget-mb", type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+        help="largest database copied into memory; bigger ones run on disk "
+             f"(default: {DEFAULT_MEMORY_BUDGET_MB})"
+    )
+    return parser.parse_args()
+
 def main():
     """Main function to execute all reports."""
+    args = parse_args()
+    
     # Connect to database
     conn = sqlite3.connect("rideshare.db")
+    if args.in_memory:
+        hot_conn = open_hot_copy(conn, args.memory_budget_mb)
+        if hot_conn is not None:
+            conn.close()
+            conn = hot_conn
     cursor = conn.cursor()
     
     # Read SQL file
@@ -76,6 +186,8 @@ def main():
             queries.append(query)
             current_query = []
     
+    print_data_summary(cursor)
+    
     # Execute each query
     report_names = [
         "Top Riders by Spending",
@@ -97,7 +209,7 @@ def main():
             
             columns, rows = execute_query(cursor, query, report_names[i])
             print_table(columns, rows, report_names[i])
-            save_to_csv(columns, rows, report_files[i])
+            save_to_csv(columns, rows, report_files[i], args.compression)
     
     print(f"\n{'#'*80}")
     print("All reports generated successfully!")
@@ -0,0 +1,209 @@
+"""
+Table statistics catalog for rideshare.db.
+
+The loader refreshes the catalog after every load so other scripts can read
+row counts, key ranges and time ranges without scanning the tables.
+"""
+import math
+from datetime import datetime
+
+# table -> (key column, time column) recorded in the catalog
+STATS_COLUMNS = {
+    "drivers": ("driver_id", "join_date"),
+    "riders": ("rider_id", "signup_date"),
+    "vehicles": ("vehicle_id", None),
+    "trips": ("trip_id", "start_time"),
+    "payments": ("payment_id", "payment_time"),
+}
+
+# Rows sampled per table to estimate distinct values of unindexed columns
+DISTINCT_SAMPLE_ROWS = 10000
+
+def create_stats_tables(cursor):
+    """Create the statistics catalog tables."""
+    # One row per table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_stats (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL,
+            key_column TEXT,
+            min_key INTEGER,
+            max_key INTEGER,
+            time_column TEXT,
+            min_time TEXT,
+            max_time TEXT,
+            updated_at TEXT
+        )
+    """)
+
+    # One row per table column; catalogs from before distinct values were
+    # estimated are rebuilt (the table only holds derived data)
+    existing_columns = get_columns(cursor, "column_stats")
+    if existing_columns and "distinct_estimate" not in existing_columns:
+        cursor.execute("DROP TABLE column_stats")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS column_stats (
+            table_name TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            distinct_estimate INTEGER,
+            null_count INTEGER,
+            PRIMARY KEY (table_name, column_name)
+        )
+    """)
+
+def get_columns(cursor, table_name):
+    """Return the column names of a table."""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    return [row[1] for row in cursor.fetchall()]
+
+def index_distinct_estimates(cursor, table_name):
+    """
+    Return {column: distinct estimate} for columns leading an index.
+
+    Read from sqlite_stat1, so ANALYZE must have run on the table: its stat is
+    "rows avg_rows_per_value ...", giving rows / avg_rows_per_value values.
+    """
+    cursor.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NOT NULL", (table_name,))
+    estimates = {}
+    for index_name, stat in cursor.fetchall():
+        fields = stat.split()
+        cursor.execute(f"PRAGMA index_info({index_name})")
+        index_columns = [row[2] for row in sorted(cursor.fetchall())]
+        if len(fields) >= 2 and index_columns and index_columns[0] is not None:
+            estimates[index_columns[0]] = round(int(fields[0]) / max(int(fields[1]), 1))
+    return estimates
+
+def build_sample(cursor, table_name, key_column, min_key, max_key, row_count):
+    """
+    Fill the temp table stats_sample with about DISTINCT_SAMPLE_ROWS rows of a table.
+
+    Rows are fetched at evenly spaced key values between min_key and max_key,
+    one indexed lookup each, so the sample is spread over the whole table
+    rather than taken from its first pages (which for the time-clustered trips
+    layouts would be the earliest trips). Small tables are copied whole.
+    """
+    cursor.execute("DROP TABLE IF EXISTS temp.stats_sample")
+    if row_count <= DISTINCT_SAMPLE_ROWS:
+        cursor.execute(f"CREATE TEMP TABLE stats_sample AS SELECT * FROM {table_name}")
+        return
+
+    step = max(1, (max_key - min_key + 1) // DISTINCT_SAMPLE_ROWS)
+    cursor.execute(f"""
+        CREATE TEMP TABLE stats_sample AS
+        WITH RECURSIVE sample_keys(sample_key) AS (
+            SELECT ?
+            UNION ALL
+            SELECT sample_key + ? FROM sample_keys WHERE sample_key + ? <= ?
+        )
+        SELECT t.*
+        FROM sample_keys CROSS JOIN {table_name} t ON t.{key_column} = sample_keys.sample_key
+    """, (min_key, step, step, max_key))
+
+def sampled_distinct_estimate(cursor, column, row_count):
+    """
+    Estimate distinct values of a column from the rows in stats_sample.
+
+    row_count is the number of non-NULL values in the full table. Uses the GEE
+    estimator sqrt(N / n) * f1 + (values seen more than once), where f1 is the
+    number of values seen exactly once among the n sampled values. A column
+    with no repeated value in the sample is taken to be unique.
+    """
+    cursor.execute(f"""
+        SELECT COUNT(*), SUM(value_count), SUM(value_count = 1), SUM(value_count > 1)
+        FROM (
+            SELECT COUNT(*) AS value_count
+            FROM stats_sample
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+        )
+    """)
+    distinct_in_sample, sampled_values, singletons, repeated = cursor.fetchone()
+    if not distinct_in_sample:
+        return 0
+    if sampled_values >= row_count:
+        # The sample is the whole table, so the count is exact
+        return distinct_in_sample
+    if not repeated:
+        return row_count
+    estimate = math.sqrt(row_count / sampled_values) * singletons + repeated
+    return min(round(estimate), row_count)
+
+def update_table_stats(conn, cursor, tables=None):
+    """
+    Recompute the catalog for the given tables (default: all).
+
+    Each table is ANALYZEd (refreshing sqlite_stat1 for SQLite's query
+    planner) and then read in a single pass for the row count, key and time
+    ranges and NULL counts. Distinct values are estimated: the key column is
+    unique, indexed columns use sqlite_stat1 and other columns a sample of
+    rows spread evenly over the key range (see build_sample).
+    """
+    create_stats_tables(cursor)
+    updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    for table_name in tables or list(STATS_COLUMNS):
+        key_column, time_column = STATS_COLUMNS[table_name]
+        columns = get_columns(cursor, table_name)
+        if not columns:
+            continue
+
+        cursor.execute(f"ANALYZE {table_name}")
+        index_estimates = index_distinct_estimates(cursor, table_name)
+
+        expressions = [
+            "COUNT(*)",
+            f"MIN({key_column})", f"MAX({key_column})",
+            f"MIN({time_column})" if time_column else "NULL",
+            f"MAX({time_column})" if time_column else "NULL",
+        ]
+        for col in columns:
+            expressions.append(f"SUM({col} IS NULL)")
+        cursor.execute(f"SELECT {', '.join(expressions)} FROM {table_name}")
+        result = cursor.fetchone()
+        row_count, min_key, max_key, min_time, max_time = result[:5]
+
+        cursor.execute(
+            "INSERT OR REPLACE INTO table_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (table_name, row_count, key_column, min_key, max_key,
+             time_column, min_time, max_time, updated_at)
+        )
+        cursor.execute("DELETE FROM column_stats WHERE table_name = ?", (table_name,))
+        sampled_columns = [col for col in columns if col != key_column and col not in index_estimates]
+        if sampled_columns and row_count:
+            build_sample(cursor, table_name, key_column, min_key, max_key, row_count)
+        for col, null_count in zip(columns, result[5:]):
+            null_count = null_count or 0
+            if col == key_column:
+                distinct_estimate = row_count
+            elif col in index_estimates:
+                distinct_estimate = index_estimates[col]
+            elif row_count:
+                distinct_estimate = sampled_distinct_estimate(cursor, col, row_count - null_count)
+            else:
+                distinct_estimate = 0
+            cursor.execute(
+                "INSERT INTO column_stats VALUES (?, ?, ?, ?)",
+                (table_name, col, distinct_estimate, null_count)
+            )
+        cursor.execute("DROP TABLE IF EXISTS temp.stats_sample")
+
+    conn.commit()
+
+def record_row_count(conn, cursor, table_name, row_count):
+    """Record the row count of a table the caller already knows, without scanning it."""
+    create_stats_tables(cursor)
+    cursor.execute(
+        "INSERT OR REPLACE INTO table_stats (table_name, row_count, updated_at) VALUES (?, ?, ?)",
+        (table_name, row_count, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+
+def read_table_stats(cursor):
+    """Return {table_name: row dict} from the catalog, or {} if it does not exist."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='table_stats'")
+    if cursor.fetchone() is None:
+        return {}
+
+    cursor.execute("SELECT * FROM table_stats")
+    columns = [description[0] for description in cursor.description]
+    return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
@@ -5,6 +5,8 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from table_stats import read_table_stats
+
 def print_table(cursor, query, title):
     """Execute query and print results as formatted table."""
     try:
@@ -60,15 +62,23 @@ def main():
     print("RIDESHARE DATABASE VIEWER")
     print("="*80)
     
-    # Show available tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    # Show available tables, using the statistics catalog instead of
+    # scanning each table (tables missing from it are counted directly)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
     tables = [row[0] for row in cursor.fetchall()]
+    stats = read_table_stats(cursor)
     
     print("\nAvailable tables:")
     for i, table in enumerate(tables, 1):
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
-        print(f"  {i}. {table} ({count} rows)")
+        if table in stats:
+            count = stats[table]["row_count"]
+        else:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            count = cursor.fetchone()[0]
+        line = f"  {i}. {table} ({count} rows"
+        if table in stats and stats[table]["min_time"]:
+            line += f", {stats[table]['min_time']} to {stats[table]['max_time']}"
+        print(line + ")")
     
     # Menu
     print("\n" + "-"*80)
@@ -47,6 +47,25 @@ CREATE TABLE IF NOT EXISTS trips (
     FOREIGN KEY (vehicle_id) REFERENCES vehicles(vehicle_id)
 );
 
+-- Time-clustered trips layouts (python scripts/load_to_sqlite.py --trips-layout ...)
+-- Trips are loaded in start_time order via an external merge sort of trips.csv,
+-- so a date-range query only reads the pages holding that range.
+--
+-- --trips-layout rowid: rows stored in start_time order, trip_id kept unique
+--   CREATE TABLE trips (
+--       trip_id INTEGER NOT NULL UNIQUE,
+--       ... same columns as above, with start_time TEXT NOT NULL ...
+--   );
+--   CREATE INDEX idx_trips_start_time ON trips (start_time);
+--
+-- --trips-layout without-rowid: table b-tree clustered on (start_time, trip_id)
+--   CREATE TABLE trips (
+--       trip_id INTEGER NOT NULL,
+--       ... same columns as above, with start_time TEXT NOT NULL ...
+--       PRIMARY KEY (start_time, trip_id)
+--   ) WITHOUT ROWID;
+--   CREATE UNIQUE INDEX idx_trips_trip_id ON trips (trip_id);
+
 -- Payments table
 CREATE TABLE IF NOT EXISTS payments (
     payment_id INTEGER PRIMARY KEY,
@@ -58,3 +77,24 @@ CREATE TABLE IF NOT EXISTS payments (
     FOREIGN KEY (trip_id) REFERENCES trips(trip_id)
 );
 
+-- Statistics catalog (maintained by scripts/load_to_sqlite.py after each load,
+-- together with ANALYZE / sqlite_stat1)
+CREATE TABLE IF NOT EXISTS table_stats (
+    table_name TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    key_column TEXT,
+    min_key INTEGER,
+    max_key INTEGER,
+    time_column TEXT,
+    min_time TEXT,
+    max_time TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS column_stats (
+    table_name TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    distinct_estimate INTEGER,
+    null_count INTEGER,
+    PRIMARY KEY (table_name, column_name)
+);